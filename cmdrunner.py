@@ -2,6 +2,7 @@
 
 from __future__ import print_function
 
+import os
 import select
 import subprocess
 import sys
@@ -10,6 +11,9 @@ import sys
 # set to True to always print the command before executing it (for debugging)
 ALWAYS_PRINT_COMMAND = False
 
+# maximum number of bytes to read from a subprocess pipe at once
+READ_SIZE = 65536
+
 
 class CommandException(Exception):
     "General exception for CommandRunner"
@@ -55,6 +59,11 @@ def __process_output(cmdname, proc, returncode_handler, stderr_finalizer,
     proc_out = proc.stdout.fileno()
     proc_err = proc.stderr.fileno()
 
+    # read big chunks from the pipes rather than a line at a time, keeping
+    #  any partial line until the rest of it arrives
+    out_partial = b""
+    err_partial = b""
+
     saved_output = []
     saw_error = False
     while proc_out is not None or proc_err is not None:
@@ -77,19 +86,28 @@ def __process_output(cmdname, proc, returncode_handler, stderr_finalizer,
         for fno in ret[0]:
             # deal with stderr
             if proc_err is not None and fno == proc_err:
-                line = proc.stderr.readline()
-                if len(line) == 0:
+                data = os.read(proc_err, READ_SIZE)
+                if len(data) == 0:
                     proc_err = None
-                elif stderr_handler is not None:
-                    stderr_handler(cmdname, line.strip().decode("utf-8"),
-                                   verbose=verbose)
+                    lines = [err_partial, ] if len(err_partial) > 0 else []
+                else:
+                    lines = (err_partial + data).split(b"\n")
+                    err_partial = lines.pop()
+                if stderr_handler is not None:
+                    for line in lines:
+                        stderr_handler(cmdname, line.strip().decode("utf-8"),
+                                       verbose=verbose)
                 continue
 
             if proc_out is not None and fno == proc_out:
-                line = proc.stdout.readline()
-                if len(line) == 0:
+                data = os.read(proc_out, READ_SIZE)
+                if len(data) == 0:
                     proc_out = None
+                    lines = [out_partial, ] if len(out_partial) > 0 else []
                 else:
+                    lines = (out_partial + data).split(b"\n")
+                    out_partial = lines.pop()
+                for line in lines:
                     line = line.rstrip().decode("utf-8")
                     if stdout_handler is not None:
                         stdout_handler(cmdname, line, saved_output, verbose)
@@ -155,7 +173,6 @@ def run_generator(cmd_args, cmdname=None, working_directory=None,
         proc.wait()
 
 
-
 def set_always_print_command(val=True):
     global ALWAYS_PRINT_COMMAND
     ALWAYS_PRINT_COMMAND = val  # pylint: disable=global-statement
@@ -116,7 +116,7 @@ def do_all_the_things(project, gitmgr, mantis_issues, test_branch,
 
         # extract the branch name from the branch path
         #  (e.g. "tags/foo" -> "foo")
-        short_branch = branch_path.rsplit("/")[-1]
+        short_branch = branch_path.rpartition("/")[2]
 
         # if we're looking for a starting branch...
         if test_branch is not None:
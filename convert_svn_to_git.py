@@ -18,16 +18,17 @@ from github_util import GitRepoManager
 from git import GitAddIgnoredException, GitException, git_add, git_autocrlf, \
      git_checkout, git_commit, git_config, git_fetch, git_init, git_pull, \
      git_push, git_remote_add, git_remove, git_reset, git_rev_parse, \
-     git_show_hash, git_status, git_submodule_add, git_submodule_remove, \
-     git_submodule_status, git_submodule_update
+     git_status, git_submodule_add, git_submodule_remove, \
+     git_submodule_set_hash, git_submodule_status, git_submodule_update, \
+     unquote_status_path
 from i3helper import TemporaryDirectory, read_input
 from mantis_converter import MantisConverter
 from pdaqdb import PDAQManager
 from project_db import AuthorDB
 from svn import AcceptType, SVNBadAncestryException, SVNConnectException, \
      SVNException, SVNMergeConflictException, SVNMetadata, \
-     SVNNonexistentException, svn_checkout, svn_get_externals, svn_info, \
-     svn_propget, svn_revert, svn_switch
+     SVNNonexistentException, svn_checkout, svn_get_externals, \
+     svn_propget, svn_revert, svn_sandbox_info, svn_switch, svn_update
 
 
 # dictionary which maps projects to their older names
@@ -52,6 +53,22 @@ GITHUB_MAIN_BRANCH = "main"
 # name used for trunk when it is replaced by a branch
 GITHUB_DEMOTED_BRANCH = "not_trunk"
 
+# number of converted revisions to accumulate before pushing them
+#  (each push pays for a new connection, but a single push at the end of a
+#  long branch can exceed the server's size limit)
+PUSH_INTERVAL = 100
+
+# map unstaged 'git status --porcelain' codes to the type of change
+(PORCELAIN_ADDED, PORCELAIN_DELETED, PORCELAIN_MODIFIED) = range(3)
+PORCELAIN_CHANGES = {
+    "??": PORCELAIN_ADDED,
+    " A": PORCELAIN_ADDED, "AA": PORCELAIN_ADDED, "MA": PORCELAIN_ADDED,
+    " D": PORCELAIN_DELETED, "AD": PORCELAIN_DELETED, "MD": PORCELAIN_DELETED,
+    " M": PORCELAIN_MODIFIED, "AM": PORCELAIN_MODIFIED,
+    "MM": PORCELAIN_MODIFIED, " T": PORCELAIN_MODIFIED,
+    "AT": PORCELAIN_MODIFIED, "MT": PORCELAIN_MODIFIED,
+}
+
 
 def add_arguments(parser):
     "Add command-line arguments"
@@ -124,6 +141,11 @@ def add_arguments(parser):
     parser.add_argument("--preserve-resolved", dest="preserve_resolved_status",
                         action="store_true", default=False,
                         help="Preserve status of resolved Mantis issues")
+    parser.add_argument("--scratch-dir", dest="scratch_dir",
+                        default=None,
+                        help="Parent directory for the temporary directory"
+                             " holding the SVN/Git sandbox (e.g. a tmpfs"
+                             " mount like /dev/shm)")
 
     parser.add_argument(dest="svn_project", default=None,
                         help="Subversion/Mantis project name")
@@ -193,14 +215,16 @@ class CompareSandboxes(object):
         return branch
 
     @classmethod
-    def compare(cls, project_name, svn_sandbox, git_sandbox, debug=False,
-                verbose=False):
-        # get Git hash for top directory
-        top_branch = git_rev_parse("HEAD", abbrev_ref=True,
-                                   sandbox_dir=git_sandbox, debug=debug,
-                                   verbose=verbose)
-        top_hash = git_rev_parse("HEAD", sandbox_dir=git_sandbox, debug=debug,
-                                 verbose=verbose)
+    def compare(cls, project_name, svn_sandbox, git_sandbox, top_branch=None,
+                top_hash=None, debug=False, verbose=False):
+        # get Git branch/hash for top directory if the caller doesn't know them
+        if top_branch is None:
+            top_branch = git_rev_parse("HEAD", abbrev_ref=True,
+                                       sandbox_dir=git_sandbox, debug=debug,
+                                       verbose=verbose)
+        if top_hash is None:
+            top_hash = git_rev_parse("HEAD", sandbox_dir=git_sandbox,
+                                     debug=debug, verbose=verbose)
 
         # get Git hashes for all submodules
         hashdict = {}
@@ -210,7 +234,8 @@ class CompareSandboxes(object):
             hashdict[subname] = (subbranch, subhash)
 
         # get information about the top-level SVN project
-        infodict = svn_info(svn_sandbox, debug=debug, verbose=verbose)
+        infodict = svn_sandbox_info(svn_sandbox, debug=debug,
+                                    verbose=verbose)
 
         # get the name of this project
         idx = infodict.url.find("projects/")
@@ -236,8 +261,9 @@ class CompareSandboxes(object):
 
             # get Subversion info for the subproject
             try:
-                infodict = svn_info(os.path.join(svn_sandbox, sub_dir),
-                                    debug=debug, verbose=verbose)
+                infodict = \
+                  svn_sandbox_info(os.path.join(svn_sandbox, sub_dir),
+                                   debug=debug, verbose=verbose)
             except SVNNonexistentException as exc:
                 print("WARNING: Ignoring non-SVN subproject \"%s\": %s" %
                       (sub_dir, exc), file=sys.stderr)
@@ -317,6 +343,15 @@ def __build_externs_dict(rewrite_proc=None, sandbox_dir=None, debug=False,
 
         externs[sub_dir] = ExternMap(sub_dir, sub_url, sub_rev)
 
+    # most revisions have no submodules, so don't ask Git about them
+    #  unless there's a '.gitmodules' file
+    if sandbox_dir is None:
+        gitmodules = ".gitmodules"
+    else:
+        gitmodules = os.path.join(sandbox_dir, ".gitmodules")
+    if not os.path.exists(gitmodules):
+        return externs
+
     for flds in git_submodule_status(sandbox_dir=sandbox_dir, debug=debug,
                                      verbose=verbose):
         sub_name, _, sub_hash, sub_branch = flds
@@ -334,26 +369,30 @@ def __categorize_files(topdir, filetypes=None):
 
     subdirs = []
     for entry in os.listdir(topdir):
-        subdir = os.path.join(topdir, entry)
-        if os.path.isdir(subdir):
-            # omit a few metadirectories
-            if subdir.endswith("/.git") or subdir.endswith("/.hg") or \
-              subdir.endswith("/.svn"):
-                subdirs.append(subdir)
-        elif entry.endswith(".py"):
+        # check the cheap filename tests before asking the filesystem
+        if entry.endswith(".py"):
             filetypes["python"] = True
         elif entry.endswith(".java"):
             filetypes["java"] = True
+        elif entry not in (".git", ".hg", ".svn"):
+            # omit a few metadirectories and don't follow symbolic links
+            #  (which may point back up the tree)
+            subdir = os.path.join(topdir, entry)
+            if os.path.isdir(subdir) and not os.path.islink(subdir):
+                subdirs.append(subdir)
 
     for subdir in subdirs:
+        # stop looking once we've seen every type we care about
+        if "python" in filetypes and "java" in filetypes:
+            break
         __categorize_files(subdir, filetypes=filetypes)
 
     return filetypes
 
 
 def __commit_to_git(project_name, revision, author, commit_date, log_message,
-                    github_issues=None, allow_empty=False, sandbox_dir=None,
-                    debug=False, verbose=False):
+                    github_issues=None, allow_empty=False, full_hash=False,
+                    sandbox_dir=None, debug=False, verbose=False):
     """
     Commit an SVN change to git, return a tuple containing:
     (git_branch, git_hash, number_changed, number_inserted, number_deleted)
@@ -373,8 +412,9 @@ def __commit_to_git(project_name, revision, author, commit_date, log_message,
                           commit_message=full_message,
                           date_string=commit_date.isoformat(),
                           filelist=None, allow_empty=allow_empty,
-                          commit_all=False, sandbox_dir=sandbox_dir,
-                          debug=debug, verbose=verbose)
+                          commit_all=False, full_hash=full_hash,
+                          sandbox_dir=sandbox_dir, debug=debug,
+                          verbose=verbose)
     except CommandException:
         if full_message is None:
             mstr = ""
@@ -405,37 +445,30 @@ def __create_gitignore(ignorelist=None, include_python=False,
     else:
         path = os.path.join(sandbox_dir, ".gitignore")
 
+    # build the entire file so it can be written with a single call
+    parts = []
+    if ignorelist is not None:
+        parts += [str(entry) for entry in ignorelist]
+    parts.append("# Ignore Subversion directory during Git transition\n.svn")
+    if include_java:
+        parts.append("\n# Java stuff\n*.class\ntarget")
+    if include_python:
+        parts.append("\n# Python stuff\n*.pyc\n__pycache__")
+
     with open(path, "w") as fout:
-        if ignorelist is not None:
-            for entry in ignorelist:
-                print("%s" % str(entry), file=fout)
-        print("# Ignore Subversion directory during Git transition\n.svn",
-              file=fout)
-        if include_java:
-            print("\n# Java stuff\n*.class\ntarget", file=fout)
-        if include_python:
-            print("\n# Python stuff\n*.pyc\n__pycache__", file=fout)
+        fout.write("\n".join(parts) + "\n")
 
 
 def __delete_untracked(git_sandbox, debug=False, verbose=False):
-    untracked = False
-    for line in git_status(sandbox_dir=git_sandbox, debug=debug,
-                           verbose=verbose):
-        if line.startswith("#"):
-            if len(line) <= 1 or not line[1].isspace():
-                line = line[1:]
-            else:
-                line = line[2:]
-
-        if not untracked:
-            if line.startswith("Untracked files:"):
-                untracked = True
-            continue
-
-        filename = line.strip()
-        if len(filename) == 0 or filename.find("use \"git add") >= 0:
+    # porcelain output skips the upstream ahead/behind check and is empty
+    #  when the sandbox is clean, so there's nothing to parse in that case
+    for line in git_status(porcelain=True, sandbox_dir=git_sandbox,
+                           debug=debug, verbose=verbose):
+        line = line.rstrip()
+        if not line.startswith("?? "):
             continue
 
+        filename = unquote_status_path(line[3:])
         if filename.endswith("/"):
             shutil.rmtree(os.path.join(git_sandbox, filename[:-1]))
         else:
@@ -447,23 +480,16 @@ def __diff_strings(str1, str2):
     Compare two strings and return the substrings where they differ
     (e.g. "ABC/def" and "ABC/ddd" would return "ef" and "dd")
     """
-    len1 = len(str1)
-    len2 = len(str2)
-    minlen = min(len1, len2)
-
-    diff = None
-    for idx in range(minlen):
-        if str1[idx] != str2[idx]:
-            diff = idx
-            break
+    # let commonprefix() find the first mismatch instead of looping in Python
+    diff = len(os.path.commonprefix((str1, str2)))
 
-    if diff is not None:
+    if diff < min(len(str1), len(str2)):
         return str1[diff-1:], str2[diff-1:]
 
-    if len1 == len2:
+    if len(str1) == len(str2):
         return "", ""
 
-    return str1[minlen:], str2[minlen:]
+    return str1[diff:], str2[diff:]
 
 
 def __fix_gitignore_conflict(sandbox_dir, debug=False, verbose=False):
@@ -517,18 +543,8 @@ def __fix_gitignore_conflict(sandbox_dir, debug=False, verbose=False):
                 for line in fin:
                     print(line.rstrip())
 
-def __fix_status_filename(filename):
-    if len(filename) >= 2 and filename[0] == filename[-1] and \
-      (filename[0] == '"' or filename[0] == "'"):
-        return filename[1:-1]
-
-    return filename
-
-
 def __gather_modifications(sandbox_dir=None, debug=False, verbose=False):
-    additions = None
-    deletions = None
-    modifications = None
+    changes = [None, None, None]
     staged = None
 
     for line in git_status(porcelain=True, sandbox_dir=sandbox_dir,
@@ -547,39 +563,21 @@ def __gather_modifications(sandbox_dir=None, debug=False, verbose=False):
             # file is staged for commit
             if staged is None:
                 staged = []
-            staged.append(__fix_status_filename(line[3:]))
-            continue
-
-        if line[0] == "?" and line[1] == "?":
-            # add unknown file
-            if additions is None:
-                additions = []
-            additions.append(__fix_status_filename(line[3:]))
+            staged.append(unquote_status_path(line[3:]))
             continue
 
-        if line[0] == " " or line[0] == "A" or line[0] == "M":
-            if line[1] == "A":
-                # file has been added
-                if additions is None:
-                    additions = []
-                additions.append(__fix_status_filename(line[3:]))
-                continue
-            if line[1] == "D":
-                # file has been deleted
-                if deletions is None:
-                    deletions = []
-                deletions.append(__fix_status_filename(line[3:]))
-                continue
-            if line[1] == "M" or line[1] == "T":
-                # file has been modified
-                if modifications is None:
-                    modifications = []
-                modifications.append(__fix_status_filename(line[3:]))
-                continue
+        # look up the type of change rather than walking through each case
+        code = line[:2]
+        if code not in PORCELAIN_CHANGES:
+            raise Exception("Unknown porcelain line \"%s\"" % str(line))
 
-        raise Exception("Unknown porcelain line \"%s\"" % str(line))
+        ctype = PORCELAIN_CHANGES[code]
+        if changes[ctype] is None:
+            changes[ctype] = []
+        changes[ctype].append(unquote_status_path(line[3:]))
 
-    return additions, deletions, modifications, staged
+    return changes[PORCELAIN_ADDED], changes[PORCELAIN_DELETED], \
+      changes[PORCELAIN_MODIFIED], staged
 
 
 def __get_mantis_projects(project_name):
@@ -601,6 +599,12 @@ def __initialize_git_workspace(git_url, svn_url, revision,
     # initialize Git repo
     __create_git_repo(sandbox_dir=sandbox_dir, debug=debug, verbose=debug)
 
+    # 'git status' runs for every revision, so let Git remember which
+    #  directories haven't changed instead of rescanning the whole tree
+    #  (older versions of Git silently ignore this setting)
+    git_config("core.untrackedCache", value="true", sandbox_dir=sandbox_dir,
+               debug=debug, verbose=verbose)
+
     # handle projects with large numbers of files
     if rename_limit is not None:
         git_config("diff.renameLimit", value=rename_limit,
@@ -677,7 +681,7 @@ def __load_svn_ignore(svn_url, revision=None, debug=False, verbose=False):
     except CommandException as cex:
         errmsg = str(cex)
         # ignore error message about missing 'svn:ignore' property
-        if errmsg.find("E200017") == 0 and errmsg.find("W200017") == 0:
+        if errmsg.find("E200017") < 0 and errmsg.find("W200017") < 0:
             raise
 
     if len(ignored) == 0:
@@ -687,15 +691,12 @@ def __load_svn_ignore(svn_url, revision=None, debug=False, verbose=False):
 
 
 def __progress_reporter(count, total, name, value_name, value):
-    spaces = " "*30
-    unspaces = "\b"*27  # leave a few spaces to separate error msgs
-
     msg = " #%d (of %d): %s %s %s" % (count, total, name, value_name, value)
     spacelen = 77 - len(msg)
 
-    spaces = " "*spacelen
-    unspaces = "\b"*(spacelen-3)
-    print("\r%s%s%s" % (msg, spaces, unspaces), end="")
+    # pad to the end of the line, then back up (leaving a few spaces to
+    #  separate error msgs) and write everything with a single call
+    sys.stdout.write("\r" + msg + " "*spacelen + "\b"*(spacelen-3))
     sys.stdout.flush()
 
 
@@ -771,21 +772,27 @@ def __stage_modifications(sandbox_dir=None, debug=False, verbose=False):
                    verbose=verbose)
         changed = True
     if additions is not None:
-        if len(additions) > 0:
-            git_add(filelist=additions, sandbox_dir=sandbox_dir, debug=debug,
-                    verbose=verbose)
         changed = True
-    if modifications is not None:
+
+    # add new and modified files with a single 'git add'
+    if additions is None:
+        addlist = modifications
+    elif modifications is None:
+        addlist = additions
+    else:
+        addlist = additions + modifications
+
+    if addlist is not None and len(addlist) > 0:
         for _ in (0, 1):
             try:
-                git_add(filelist=modifications, sandbox_dir=sandbox_dir,
+                git_add(filelist=addlist, sandbox_dir=sandbox_dir,
                         debug=debug, verbose=verbose)
                 changed = True
                 break
             except GitAddIgnoredException as aex:
                 deleted = []
                 for entry in aex.files:
-                    for mod in modifications:
+                    for mod in addlist:
                         if mod.startswith(entry) and \
                           (entry == mod or mod[len(entry)] == os.sep):
                             deleted.append(mod)
@@ -793,21 +800,60 @@ def __stage_modifications(sandbox_dir=None, debug=False, verbose=False):
                 ignored = 0
                 for path in deleted:
                     try:
-                        del modifications[modifications.index(path)]
+                        del addlist[addlist.index(path)]
                         ignored += 1
                     except ValueError:
                         # maybe we already deleted it?
                         continue
                 print("WARNING: Retrying git_add with modified files"
                       " (%d ignored): %s" %
-                      (ignored, ", ".join(modifications)), file=sys.stderr)
+                      (ignored, ", ".join(addlist)), file=sys.stderr)
 
     # return True if we found changes
     return changed
 
 
+def __switch_or_update(svn_url, revision, curr_url=None, accept_type=None,
+                       ignore_ancestry=False, ignore_externals=False,
+                       sandbox_dir=None, debug=False, verbose=False):
+    """
+    If the sandbox is already on 'svn_url', use the much cheaper 'svn update'
+    to move to 'revision', otherwise 'svn switch' to the new URL
+    """
+    # only compare the URLs, ignoring any peg revision
+    #  ('svn update' has no --ignore-ancestry, so retries must use 'switch')
+    if not ignore_ancestry and curr_url is not None and \
+      curr_url.split("@", 1)[0] == svn_url.split("@", 1)[0]:
+        return svn_update(revision=revision, accept_type=accept_type,
+                          ignore_externals=ignore_externals,
+                          sandbox_dir=sandbox_dir, debug=debug,
+                          verbose=verbose)
+
+    return svn_switch(svn_url, revision=revision, accept_type=accept_type,
+                      ignore_ancestry=ignore_ancestry,
+                      ignore_externals=ignore_externals,
+                      sandbox_dir=sandbox_dir, debug=debug, verbose=verbose)
+
+
 def __switch_project(project_name, top_url, revision, ignore_externals=False,
                      sandbox_dir=None, debug=False, verbose=False):
+    # find the URL and revision for the current sandbox
+    try:
+        infodict = svn_sandbox_info(sandbox_dir, debug=debug,
+                                    verbose=verbose)
+        curr_url = infodict.url
+        curr_rev = int(infodict.revision)
+    except (CommandException, AttributeError, ValueError):
+        curr_url = None
+        curr_rev = None
+
+    # if we're ignoring externals and the sandbox is already at the
+    #  requested URL and revision, there's nothing to do
+    if ignore_externals and revision is not None and \
+      curr_rev == revision and curr_url is not None and \
+      curr_url.split("@", 1)[0] == top_url.split("@", 1)[0]:
+        return
+
     tmp_url = top_url
     switch_exc = None
     ignore_ancestry = False
@@ -815,12 +861,13 @@ def __switch_project(project_name, top_url, revision, ignore_externals=False,
     for _ in (0, 1, 2):
         conflicts = []
         try:
-            for line in svn_switch(tmp_url, revision=revision,
-                                   accept_type=AcceptType.WORKING,
-                                   ignore_ancestry=ignore_ancestry,
-                                   ignore_externals=ignore_externals,
-                                   sandbox_dir=sandbox_dir, debug=debug,
-                                   verbose=verbose):
+            for line in __switch_or_update(tmp_url, revision,
+                                           curr_url=curr_url,
+                                           accept_type=AcceptType.WORKING,
+                                           ignore_ancestry=ignore_ancestry,
+                                           ignore_externals=ignore_externals,
+                                           sandbox_dir=sandbox_dir,
+                                           debug=debug, verbose=verbose):
                 xline = line.strip()
                 if xline.startswith("C "):
                     badname = xline.split()[1]
@@ -902,8 +949,14 @@ def __update_both_sandboxes(project_name, gitmgr, sandbox_dir, svn_url,
 def convert_revision(database, gitmgr, mantis_issues, count, top_url,
                      git_remote, entry, first_commit=False,
                      issue_count=None, issue_pause=None, noisy=False,
-                     pause_before_commit=False, rewrite_proc=None,
-                     sandbox_dir=None, debug=False, verbose=False):
+                     pause_before_commit=False, push=True,
+                     rewrite_proc=None, extern_targets=None, sandbox_dir=None,
+                     debug=False, verbose=False):
+    """
+    Convert a single SVN revision to a Git commit.  If 'push' is False,
+    the caller is responsible for pushing the new commit to the remote repo.
+    'extern_targets' is passed to switch_and_update_externals()
+    """
     # assume that the database name is the project name
     project_name = database.name
 
@@ -929,6 +982,7 @@ def convert_revision(database, gitmgr, mantis_issues, count, top_url,
         switch_and_update_externals(database, gitmgr, top_url, revision,
                                     entry.date_string,
                                     rewrite_proc=rewrite_pdaq,
+                                    extern_targets=extern_targets,
                                     sandbox_dir=sandbox_dir, debug=debug,
                                     verbose=verbose)
 
@@ -965,30 +1019,28 @@ def convert_revision(database, gitmgr, mantis_issues, count, top_url,
 
     commit_result = __commit_to_git(project_name, entry.revision, entry.author,
                                     entry.date, entry.log_message,
-                                    allow_empty=count == 0,
+                                    allow_empty=count == 0, full_hash=True,
                                     sandbox_dir=sandbox_dir,
                                     debug=debug, verbose=verbose)
 
     # break tuple of results into separate values
-    (git_branch, short_hash, changed, inserted, deleted) = \
+    (git_branch, full_hash, changed, inserted, deleted) = \
       commit_result
+    if full_hash is None or len(full_hash) != 40:
+        raise Exception("Expected %s commit to return a full hash, not %s" %
+                        (sandbox_dir, full_hash))
+    short_hash = full_hash[:7]
     if noisy:
         print("  >>%s:%s(m%s i%s d%s)" % (git_branch, short_hash, changed,
                                           inserted, deleted), end="")
     sys.stdout.flush()
 
-    # get the full hash string for the commit
-    full_hash = git_show_hash(sandbox_dir=sandbox_dir, debug=debug,
-                              verbose=verbose)
-    if not full_hash.startswith(short_hash):
-        raise Exception("Expected %s hash %s to start with %s" %
-                        (sandbox_dir, full_hash, short_hash))
-
     # write branch/hash info for this revision to database
     database.save_revision(revision, git_branch, full_hash)
 
     print()
     CompareSandboxes.compare(database.name, sandbox_dir, sandbox_dir,
+                             top_branch=git_branch, top_hash=full_hash,
                              debug=debug, verbose=verbose)
 
     # if we opened one or more issues, close them now
@@ -1004,7 +1056,9 @@ def convert_revision(database, gitmgr, mantis_issues, count, top_url,
         for github_issue in github_issues:
             mantis_issues.close_github_issue(github_issue, message)
 
-    __push_to_remote_git_repo(git_remote, sandbox_dir=sandbox_dir, debug=debug)
+    if push:
+        __push_to_remote_git_repo(git_remote, sandbox_dir=sandbox_dir,
+                                  debug=debug)
 
     return True
 
@@ -1023,27 +1077,43 @@ def convert_svn_to_git(project, gitmgr, mantis_issues, git_url,
     # we'll use the project name as the workspace directory name
     sandbox_dir = project.name
 
+    # these don't change from revision to revision,
+    #  so work them out before entering the loop
+    if database.name in IGNORED_REVISIONS:
+        ignored_revs = frozenset(IGNORED_REVISIONS[database.name])
+    else:
+        ignored_revs = frozenset()
+    pause_for_issues = mantis_issues is not None and \
+      pause_seconds is not None and pause_seconds > 0
+
+    trunk_name = SVNMetadata.TRUNK_NAME
+
+    # map external sandbox paths to the (url, revision, git_branch, git_hash)
+    #  they were last updated to during this conversion
+    extern_targets = {}
+
     initialized = False
     prev_checkpoint_list = None
     need_newline = False
     for branch_path, top_url, _ in database.project_urls(project.name,
                                                          project.project_url):
         if branch_path is None:
-            branch_path = SVNMetadata.TRUNK_NAME
+            branch_path = trunk_name
+        is_trunk = branch_path == trunk_name
 
         # determine Git branch to use
         git_remote = None
         if trunk_branch is not None:
             if branch_path.endswith(trunk_branch):
                 git_remote = GITHUB_MAIN_BRANCH
-            elif branch_path == SVNMetadata.TRUNK_NAME:
+            elif is_trunk:
                 git_remote = GITHUB_DEMOTED_BRANCH
-        elif branch_path == SVNMetadata.TRUNK_NAME:
+        elif is_trunk:
             git_remote = GITHUB_MAIN_BRANCH
 
         # if we haven't got a Git branch yet, construct one from the SVN branch
         if git_remote is None:
-            git_remote = branch_path.rsplit("/")[-1]
+            git_remote = branch_path.rpartition("/")[2]
             if git_remote in ("HEAD", GITHUB_MAIN_BRANCH):
                 raise Exception("Questionable branch name \"%s\"" %
                                 (git_remote, ))
@@ -1079,6 +1149,7 @@ def convert_svn_to_git(project, gitmgr, mantis_issues, git_url,
 
         start_time = datetime.now()
         num_entries = database.num_entries(branch_path)
+        unpushed = 0
         for count, entry in enumerate(database.entries(branch_path)):
             if early_exit is not None and entry.revision > early_exit:
                 # we're debugging and want to exit after a specified revision
@@ -1090,8 +1161,7 @@ def convert_svn_to_git(project, gitmgr, mantis_issues, git_url,
                                 entry.revision)
             need_newline = True
 
-            if database.name in IGNORED_REVISIONS and \
-              entry.revision in IGNORED_REVISIONS[database.name]:
+            if entry.revision in ignored_revs:
                 print("Ignoring %s rev %s" % (database.name, entry.revision))
                 continue
 
@@ -1118,7 +1188,8 @@ def convert_svn_to_git(project, gitmgr, mantis_issues, git_url,
                                 issue_count=issue_count,
                                 issue_pause=issue_pause, noisy=noisy,
                                 pause_before_commit=pause_before_commit,
-                                rewrite_proc=rewrite_proc,
+                                push=False, rewrite_proc=rewrite_proc,
+                                extern_targets=extern_targets,
                                 sandbox_dir=sandbox_dir, debug=debug,
                                 verbose=verbose):
                 if prev_saved is not None:
@@ -1127,9 +1198,15 @@ def convert_svn_to_git(project, gitmgr, mantis_issues, git_url,
                 prev_saved = entry
                 first_commit = False
 
-                if mantis_issues is not None and \
-                  pause_seconds is not None and \
-                  pause_seconds > 0:
+                # push commits in batches rather than after every revision
+                unpushed += 1
+                if unpushed >= PUSH_INTERVAL:
+                    __push_to_remote_git_repo(git_remote,
+                                              sandbox_dir=sandbox_dir,
+                                              debug=debug)
+                    unpushed = 0
+
+                if pause_for_issues:
                     now_time = datetime.now()
                     elapsed = now_time - start_time
                     if elapsed.seconds > pause_interval:
@@ -1138,6 +1215,11 @@ def convert_svn_to_git(project, gitmgr, mantis_issues, git_url,
                         time.sleep(pause_seconds)
                         start_time = now_time
 
+        # push anything left over from this branch
+        if unpushed > 0:
+            __push_to_remote_git_repo(git_remote, sandbox_dir=sandbox_dir,
+                                      debug=debug)
+
         # if we printed any status lines, end on a new line
         if need_newline:
             print()
@@ -1415,48 +1497,49 @@ def save_checkpoint_files(workspace, project_name, branch_path, revision,
     suffix = ".tgz"
 
     base_name = "%s_%s_r%s" % \
-      (project_name, branch_path.rsplit("/")[-1], revision)
+      (project_name, branch_path.rpartition("/")[2], revision)
     fullpath = os.path.join(tardir, base_name + suffix)
 
-    curdir = os.getcwd()
     try:
-        os.chdir(workspace)
+        with tarfile.open(fullpath, mode="w:gz") as tar:
+            tar.add(workspace, arcname=project_name)
+    except KeyboardInterrupt:
+        raise
+    except:
+        traceback.print_exc()
+        print("Deleting failed workspace checkpoint file \"%s\"" %
+              (fullpath, ))
+        os.unlink(fullpath)
+        fullpath = None
+
+    git_repo_name = project_name + ".git"
+    if not is_local_repo:
+        path2 = None
+    else:
+        path2 = os.path.join(tardir, "repo_" + base_name + suffix)
         try:
-            with tarfile.open(fullpath, mode="w:gz") as tar:
-                tar.add(".", arcname=project_name)
-        except KeyboardInterrupt:
-            raise
+            with tarfile.open(path2, mode="w:gz") as tar:
+                tar.add(os.path.join(local_repo_path, git_repo_name),
+                        arcname=git_repo_name)
         except:
             traceback.print_exc()
-            print("Deleting failed workspace checkpoint file \"%s\"" %
-                  (fullpath, ))
-            os.unlink(fullpath)
-            fullpath = None
-
-        os.chdir(local_repo_path)
-        git_repo_name = project_name + ".git"
-        if not is_local_repo:
+            print("Deleting failed Git repo checkpoint file \"%s\"" %
+                  (path2, ))
+            os.unlink(path2)
             path2 = None
-        else:
-            path2 = os.path.join(tardir, "repo_" + base_name + suffix)
-            try:
-                with tarfile.open(path2, mode="w:gz") as tar:
-                    tar.add(git_repo_name)
-            except:
-                traceback.print_exc()
-                print("Deleting failed Git repo checkpoint file \"%s\"" %
-                      (path2, ))
-                os.unlink(path2)
-                path2 = None
 
-        return (fullpath, path2)
-    finally:
-        os.chdir(curdir)
+    return (fullpath, path2)
 
 
 def switch_and_update_externals(database, gitmgr, top_url, revision,
                                 date_string, rewrite_proc=None,
-                                sandbox_dir=None, debug=False, verbose=False):
+                                extern_targets=None, sandbox_dir=None,
+                                debug=False, verbose=False):
+    """
+    Switch the project and its externals to 'revision'.  If 'extern_targets'
+    is not None, it maps each external's path to the target it was last
+    updated to, and externals which haven't moved are not updated again
+    """
     # fix any naming or URL problems
     if rewrite_proc is not None:
         new_name, top_url, revision = \
@@ -1482,9 +1565,13 @@ def switch_and_update_externals(database, gitmgr, top_url, revision,
                 return
         raise
 
+    # list of existing submodules which need to be updated
+    updated = []
+
     # update all externals
-    for flds in svn_get_externals(svn_url=top_url, revision=revision,
-                                  sandbox_dir=sandbox_dir, debug=debug,
+    #  (the sandbox is now at 'top_url' and 'revision', so read the
+    #  property from the working copy instead of asking the server)
+    for flds in svn_get_externals(sandbox_dir=sandbox_dir, debug=debug,
                                   verbose=verbose):
         # unpack the fields
         sub_rev, sub_url, sub_dir = flds
@@ -1557,13 +1644,6 @@ def switch_and_update_externals(database, gitmgr, top_url, revision,
         else:
             sub_path = os.path.join(sandbox_dir, sub_dir)
 
-        # build the URL for the previous entry and update everything
-        prev_url = sub_proj.create_project_url(prev_entry.branch_name)
-        __update_both_sandboxes(sub_name, gitmgr, sub_path, prev_url,
-                                prev_entry.revision, prev_entry.git_branch,
-                                prev_entry.git_hash, debug=debug,
-                                verbose=verbose)
-
         # find the hash which matches the current revision
         flds = \
           sub_proj.database.find_hash_from_revision(sub_branch, sub_rev,
@@ -1583,10 +1663,27 @@ def switch_and_update_externals(database, gitmgr, top_url, revision,
         else:
             new_url = sub_proj.create_project_url(new_svn_branch)
 
-        # update to the "real" revision
-        __update_both_sandboxes(sub_name, gitmgr, sub_path, new_url, new_rev,
-                                new_git_branch, new_hash, debug=debug,
-                                verbose=verbose)
+        # most externals don't change from one revision to the next,
+        #  so only update the sandboxes if this one has moved
+        target = (new_url, new_rev, new_git_branch, new_hash)
+        if extern_targets is None or sub_path not in extern_targets or \
+          extern_targets[sub_path] != target or \
+          not os.path.exists(sub_path):
+            # build the URL for the previous entry and update everything
+            prev_url = sub_proj.create_project_url(prev_entry.branch_name)
+            __update_both_sandboxes(sub_name, gitmgr, sub_path, prev_url,
+                                    prev_entry.revision,
+                                    prev_entry.git_branch,
+                                    prev_entry.git_hash, debug=debug,
+                                    verbose=verbose)
+
+            # update to the "real" revision
+            __update_both_sandboxes(sub_name, gitmgr, sub_path, new_url,
+                                    new_rev, new_git_branch, new_hash,
+                                    debug=debug, verbose=verbose)
+
+            if extern_targets is not None:
+                extern_targets[sub_path] = target
 
         # get the Github or local repo object
         subrepo = gitmgr.get_repo(sub_name, debug=debug, verbose=verbose)
@@ -1597,11 +1694,17 @@ def switch_and_update_externals(database, gitmgr, top_url, revision,
             git_submodule_add(subrepo.ssh_url, sandbox_dir=sandbox_dir,
                               debug=debug, verbose=verbose)
         else:
-            git_submodule_update(sub_name, new_hash, sandbox_dir=sandbox_dir,
-                                 debug=debug, verbose=verbose)
+            git_submodule_set_hash(sub_name, new_hash, sandbox_dir=sandbox_dir,
+                                   debug=debug, verbose=verbose)
+            updated.append(sub_name)
 
         externs[sub_name].set_added(True)
 
+    # update all the changed submodules with a single command
+    if len(updated) > 0:
+        git_submodule_update(updated, sandbox_dir=sandbox_dir, debug=debug,
+                             verbose=verbose)
+
     for ext_dir, ext_map in sorted(externs.items(), key=lambda x: x[0]):
         if ext_map.is_added:
             continue
@@ -1617,6 +1720,9 @@ def switch_and_update_externals(database, gitmgr, top_url, revision,
         if os.path.exists(ext_path):
             shutil.rmtree(ext_path)
 
+        if extern_targets is not None and ext_path in extern_targets:
+            del extern_targets[ext_path]
+
 
 def validate_trunk_branch(project, trunk_branch):
     """
@@ -1707,7 +1813,7 @@ def main():
     validate_trunk_branch(project, args.trunk_branch)
 
     # execute everything in a temporary directory which will be erased on exit
-    with TemporaryDirectory():
+    with TemporaryDirectory(parent_dir=args.scratch_dir):
         print("Converting %s repo" % (args.svn_project, ))
         try:
             convert_svn_to_git(project, gitmgr, mantis_issues, gitrepo.ssh_url,
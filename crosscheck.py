@@ -11,7 +11,8 @@ import traceback
 
 from cmptree import CompareTrees
 from git import GitBadPathspecException, GitException, git_checkout, \
-     git_clone, git_status, git_submodule_status, git_submodule_update
+     git_clone, git_status, git_submodule_status, git_submodule_update, \
+     unquote_status_path
 from i3helper import TemporaryDirectory, read_input
 from svn import SVNConnectException, SVNMetadata, svn_checkout, \
      svn_get_externals, svn_info, svn_list, svn_switch
@@ -55,24 +56,15 @@ def add_arguments(parser):
 
 
 def __delete_untracked(git_sandbox, debug=False, verbose=False):
-    untracked = False
-    for line in git_status(sandbox_dir=git_sandbox, debug=debug,
-                           verbose=verbose):
-        if line.startswith("#"):
-            if len(line) <= 1 or not line[1].isspace():
-                line = line[1:]
-            else:
-                line = line[2:]
-
-        if not untracked:
-            if line.startswith("Untracked files:"):
-                untracked = True
-            continue
-
-        filename = line.strip()
-        if filename == "" or filename.find("use \"git add") >= 0:
+    # only untracked entries matter, and the porcelain output lists them
+    #  as '?? path' without any of the human-readable commentary
+    for line in git_status(porcelain=True, sandbox_dir=git_sandbox,
+                           debug=debug, verbose=verbose):
+        line = line.rstrip()
+        if not line.startswith("?? "):
             continue
 
+        filename = unquote_status_path(line[3:])
         if filename.endswith("/"):
             shutil.rmtree(os.path.join(git_sandbox, filename[:-1]))
         else:
@@ -348,7 +348,8 @@ class CommitHandler(object):
 
     def __init__(self, sandbox_dir=None, author=None, commit_message=None,
                  date_string=None, filelist=None, allow_empty=False,
-                 commit_all=False, debug=False, dry_run=False, verbose=False):
+                 commit_all=False, full_hash=False, debug=False,
+                 dry_run=False, verbose=False):
 
         self.__init_regexps()
 
@@ -377,6 +378,7 @@ class CommitHandler(object):
             self.__extra_args.append("-a")
 
         self.__commit_message = commit_message
+        self.__full_hash = full_hash
         self.__debug = debug
         self.__dry_run = dry_run
         self.__verbose = verbose
@@ -478,6 +480,10 @@ class CommitHandler(object):
             cmd_args = ["git", "commit", "-F", commit_file] + self.__extra_args
             cmdname = " ".join(cmd_args[:2]).upper()
 
+            # ask Git to report the full hash in the commit summary line
+            if self.__full_hash:
+                cmd_args[1:1] = ["-c", "core.abbrev=40"]
+
             while True:
                 for line in run_generator(cmd_args, cmdname=cmdname,
                                           returncode_handler=self.__hndl_rtncd,
@@ -508,18 +514,22 @@ class CommitHandler(object):
 
 def git_commit(sandbox_dir=None, author=None, commit_message=None,
                date_string=None, filelist=None, allow_empty=False,
-               commit_all=False, debug=False, dry_run=False, verbose=False):
+               commit_all=False, full_hash=False, debug=False, dry_run=False,
+               verbose=False):
     """
     Commit all changes to the local repository
 
     Return a tuple containing:
     (branch_name, hash_id, number_changed, number_inserted, number_deleted)
+
+    If 'full_hash' is True, 'hash_id' is the full hash instead of the
+    abbreviated one
     """
 
     handler = CommitHandler(sandbox_dir, author, commit_message, date_string,
                             filelist, allow_empty=allow_empty,
-                            commit_all=commit_all, debug=debug,
-                            dry_run=dry_run, verbose=verbose)
+                            commit_all=commit_all, full_hash=full_hash,
+                            debug=debug, dry_run=dry_run, verbose=verbose)
     return handler.run_handler()
 
 
@@ -1066,6 +1076,43 @@ def git_status(sandbox_dir=None, porcelain=False, debug=False, dry_run=False,
         yield line
 
 
+# byte values for the single-character escapes in quoted 'git status' paths
+QUOTED_PATH_ESCAPES = {"a": 7, "b": 8, "t": 9, "n": 10, "v": 11, "f": 12,
+                       "r": 13, "\"": 34, "\\": 92}
+
+
+def unquote_status_path(path):
+    """
+    Remove the quotes and C-style escapes which 'git status' adds to
+    unusual paths (e.g. "caf\\303\\251" becomes u"caf\\xe9")
+    """
+    if len(path) < 2 or path[0] != '"' or path[-1] != '"':
+        return path
+
+    # rebuild the original UTF-8 bytes, then decode them
+    raw = bytearray()
+    idx = 1
+    end = len(path) - 1
+    while idx < end:
+        if path[idx] == "\\" and idx + 1 < end:
+            nxt = path[idx + 1]
+            if nxt in QUOTED_PATH_ESCAPES:
+                raw.append(QUOTED_PATH_ESCAPES[nxt])
+                idx += 2
+                continue
+
+            octal = path[idx + 1:idx + 4]
+            if len(octal) == 3 and all("0" <= x <= "7" for x in octal):
+                raw.append(int(octal, 8))
+                idx += 4
+                continue
+
+        raw.extend(path[idx].encode("utf-8"))
+        idx += 1
+
+    return raw.decode("utf-8")
+
+
 def git_submodule_add(url, git_hash=None, force=False, sandbox_dir=None,
                       debug=False,
                       dry_run=False, verbose=False):
@@ -1141,8 +1188,9 @@ def git_submodule_remove(name, sandbox_dir=None, debug=False, dry_run=False,
         shutil.rmtree(subpath)
 
     # if submodule is found in the index, remove it
+    #  (only list the submodule path rather than the entire index)
     found = False
-    for line in git_ls_files(filelist=None, list_option=LIST_CACHED,
+    for line in git_ls_files(filelist=name, list_option=LIST_CACHED,
                              sandbox_dir=sandbox_dir, debug=debug,
                              verbose=verbose):
         if line.endswith(name):
@@ -1188,26 +1236,41 @@ def git_submodule_status(sandbox_dir=None, debug=False, dry_run=False,
         yield (name, status, sha1, branchname)
 
 
+def git_submodule_set_hash(name, git_hash, sandbox_dir=None, debug=False,
+                           dry_run=False, verbose=False):
+    "Point the index entry for a Git submodule at a new hash"
+
+    if name is None:
+        raise GitException("Submodule name cannot be None")
+
+    update_args = ("git", "update-index", "--cacheinfo",
+                   "160000", unicode(git_hash), unicode(name))
+
+    try:
+        run_command(update_args, cmdname=" ".join(update_args[:3]).upper(),
+                    working_directory=sandbox_dir, debug=debug,
+                    dry_run=dry_run, verbose=verbose)
+    except CommandException as cex:
+        raise GitException("Cannot update submodule %s index"
+                           " to hash %s: %s" % (name, git_hash, cex))
+
+
 def git_submodule_update(name=None, git_hash=None, initialize=False,
                          merge=False, recursive=False, remote=False,
                          sandbox_dir=None, debug=False, dry_run=False,
                          verbose=False):
-    "Update one or more Git submodules"
+    """
+    Update one or more Git submodules
+    name - either a single submodule name or a list of submodule names
+    """
 
     if git_hash is not None:
-        if name is None:
-            raise GitException("Submodule name cannot be None")
-
-        update_args = ("git", "update-index", "--cacheinfo",
-                       "160000", unicode(git_hash), unicode(name))
+        if name is None or isinstance(name, (tuple, list)):
+            raise GitException("Hash %s requires a single submodule name" %
+                               (git_hash, ))
 
-        try:
-            run_command(update_args, cmdname=" ".join(update_args[:3]).upper(),
-                        working_directory=sandbox_dir, debug=debug,
-                        dry_run=dry_run, verbose=verbose)
-        except CommandException as cex:
-            raise GitException("Cannot update submodule %s index"
-                               " to hash %s: %s" % (name, git_hash, cex))
+        git_submodule_set_hash(name, git_hash, sandbox_dir=sandbox_dir,
+                               debug=debug, dry_run=dry_run, verbose=verbose)
 
     cmd_args = ["git", "submodule", "update"]
     if initialize:
@@ -1218,7 +1281,9 @@ def git_submodule_update(name=None, git_hash=None, initialize=False,
         cmd_args.append("--recursive")
     if remote:
         cmd_args.append("--remote")
-    if name is not None:
+    if isinstance(name, (tuple, list)):
+        cmd_args += name
+    elif name is not None:
         cmd_args.append(name)
 
     run_command(cmd_args, cmdname=" ".join(cmd_args[:3]).upper(),
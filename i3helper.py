@@ -81,13 +81,14 @@ class TemporaryDirectory(object):
         ...temporary directory no longer exists..
     """
 
-    def __init__(self):
+    def __init__(self, parent_dir=None):
         self.__origdir = os.getcwd()
+        self.__parent_dir = parent_dir
         self.__scratchdir = None
 
     def __enter__(self):
         "Create and move to temporary directory"
-        self.__scratchdir = tempfile.mkdtemp()
+        self.__scratchdir = tempfile.mkdtemp(dir=self.__parent_dir)
         os.chdir(self.__scratchdir)
         return self
 
@@ -349,6 +349,11 @@ class MantisConverter(object):
 
             issues.append(self.__all_issues[inum])
 
+        # most calls come from open_github_issues() after the earlier issues
+        #  have already been added, so don't bother if there's nothing to do
+        if len(issues) == 0:
+            return
+
         if verbose:
             print("\nOpening %d issues%s" %
                   (len(issues), "" if mantis_id is None
@@ -4,14 +4,11 @@ from __future__ import print_function
 
 import argparse
 import getpass
-import os
 import sys
 
 from github import GithubException
 
-from git import git_clone
 from github_util import GithubUtil
-from i3helper import TemporaryDirectory
 from mantis_converter import MantisConverter
 
 
@@ -161,20 +158,11 @@ def read_github_token(filename):
             return line
 
 
-def move_issues(mantis_issues, gitrepo, project_name, description,
-                mantis_id=None, add_after=False, debug=False,
-                verbose=False):
-    # remember the current directory
-    with TemporaryDirectory():
-        # clone the GitHub project
-        git_clone(gitrepo.ssh_url, debug=debug, verbose=verbose)
-
-        # move into the repo sandbox directory
-        os.chdir(project_name)
-
-        # add all issues
-        mantis_issues.add_issues(mantis_id=mantis_id, add_after=add_after,
-                                 report_progress=__progress_reporter)
+def move_issues(mantis_issues, mantis_id=None, add_after=False):
+    # issues are added through the GitHub API, so there's no need to
+    #  clone the repository or change directories
+    mantis_issues.add_issues(mantis_id=mantis_id, add_after=add_after,
+                             report_progress=__progress_reporter)
 
     print()
 
@@ -207,10 +195,8 @@ def main():
         raise SystemExit("No issues found for %s" % mantis_project)
 
     print("Uploading %d %s issues" % (len(mantis_issues), args.github_project))
-    description = "Test repo for %s issues" % str(args.github_project)
-    move_issues(mantis_issues, gitrepo, ghutil.repository, description,
-                mantis_id=args.mantis_id, add_after=args.add_after,
-                debug=args.debug, verbose=args.verbose)
+    move_issues(mantis_issues, mantis_id=args.mantis_id,
+                add_after=args.add_after)
 
 
 if __name__ == "__main__":
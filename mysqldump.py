@@ -41,6 +41,9 @@ class DumpParser(object):
     (T_TBLNEW, T_COLUMN, T_KEY, T_ENUM, T_INSERT, T_INDATA, T_INEND,
      T_COMMENT) = ("TN", "CL", "KY", "EN", "IN", "DI", "I$", "##")
 
+    # number of bytes to read from the dump file at a time
+    BLOCK_SIZE = 65536
+
     def __init__(self, filename):
         self.__name = filename
         self.__gzipped = self.__is_gzipped(filename)
@@ -249,7 +252,7 @@ class DumpParser(object):
             fin = open(self.__name, "rb")
         try:
             while True:
-                block = fin.read(16384)  #fin.read(1024)
+                block = fin.read(self.BLOCK_SIZE)
                 if debug and LOUD:
                     if block is None:
                         blkstr = "NONE"
@@ -591,18 +594,45 @@ class DataTable(object):
         self.__name = name
         self.__rows = []
 
+        # dictionary mapping column names to a dictionary which maps
+        #  each column value to the list of rows containing that value
+        self.__indexes = {}
+
     def __len__(self):
         return len(self.__rows)
 
+    def __build_index(self, colname):
+        index = {}
+        for row in self.__rows:
+            key = row[colname]
+            if key not in index:
+                index[key] = [row, ]
+            else:
+                index[key].append(row)
+
+        self.__indexes[colname] = index
+        return index
+
     def add_row(self, row_obj):
         self.__rows.append(row_obj)
 
+        # forget any indexes built from the old list of rows
+        if len(self.__indexes) > 0:
+            self.__indexes = {}
+
     def create_row(self):
         return DataRow(self)
 
     def find(self, xid, colname="id"):
-        for row in self.__rows:
-            if row[colname] == xid:
+        # the same table is searched once per issue, so build an index on
+        #  the first search rather than scanning every row every time
+        if colname in self.__indexes:
+            index = self.__indexes[colname]
+        else:
+            index = self.__build_index(colname)
+
+        if xid in index:
+            for row in index[xid]:
                 yield row
 
     @property
@@ -622,14 +652,8 @@ class MySQLDump(object):
     def __parse_data_row(cls, rowstr, table, debug=False):
         row_obj = table.data_table.create_row()
 
-        cmpstr = None
         #for idx, vstr in enumerate(cls.DATA_PAT.findall(rowstr)):
         for idx, vstr in enumerate(cls.__split_row(rowstr, debug=debug)):
-            if cmpstr is None:
-                cmpstr = vstr
-            else:
-                cmpstr += "," + vstr
-
             try:
                 col = table.column(idx)
             except IndexError:
@@ -690,10 +714,6 @@ class MySQLDump(object):
                 print("%s.%s <- %s" % (table.name, col.name, value))
             row_obj.set_value(col, value)
 
-        if False and cmpstr != rowstr:
-            raise Exception("!!MISMATCH!!\n%s\nRaw: %s\n%s\nNew: %s" %
-                            ("-"*79, rowstr, "-"*79, cmpstr))
-
         if debug:
             print("AddRow[%s] <- %s" % (table.name, row_obj), file=sys.stderr)
         table.data_table.add_row(row_obj)
@@ -849,15 +869,18 @@ class MySQLDump(object):
         parser = DumpParser(filename)
 
         table = None
+        use_table = False
         for tokens in parser.tokenize(debug=debug, verbose=verbose):
             if tokens[0] == DumpParser.T_TBLNEW:
-                if table is not None:
-                    if cls.__use_table(table.name, include_list=include_list,
-                                       omit_list=omit_list):
-                        yield table
+                if table is not None and use_table:
+                    yield table
 
                 (tblname, ) = tokens[1:]
                 table = SQLTableDef(tblname)
+
+                # don't bother parsing rows from tables which won't be returned
+                use_table = cls.__use_table(tblname, include_list=include_list,
+                                            omit_list=omit_list)
             elif tokens[0] == DumpParser.T_COLUMN:
                 (colname, coltype, collen, is_unsigned, not_null, default) = \
                   tokens[1:]
@@ -870,6 +893,9 @@ class MySQLDump(object):
                 (colname, coltype, values, not_null, dflt_value) = tokens[1:]
                 table.add_enum(colname, coltype, values, not_null, dflt_value)
             elif tokens[0] == DumpParser.T_INDATA:
+                if not use_table:
+                    continue
+
                 if table.data_table is None:
                     dtbl = cls.create_data_table(table.name)
                     if dtbl is not None:
@@ -882,10 +908,8 @@ class MySQLDump(object):
                 pass
 
         # return final table
-        if table is not None and table.data_table is not None:
-            if cls.__use_table(table.name, include_list=include_list,
-                               omit_list=omit_list):
-                yield table
+        if table is not None and table.data_table is not None and use_table:
+            yield table
 
 
 #from profile_code import profile
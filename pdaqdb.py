@@ -184,14 +184,16 @@ class PDAQManager(object):
         Return the object which captures all information about the requested
         Subversion project
         """
-        if renamed is not None and name not in renamed:
-            svn_name = name
-        else:
-            svn_name = renamed[name]
+        # externals look up the same projects on every revision,
+        #  so only work out the URL the first time
+        if name not in cls.__PROJECTS:
+            if renamed is not None and name not in renamed:
+                svn_name = name
+            else:
+                svn_name = renamed[name]
 
-        url, svn_project = cls.__get_pdaq_project_data(svn_name)
+            url, svn_project = cls.__get_pdaq_project_data(svn_name)
 
-        if name not in cls.__PROJECTS:
             cls.__PROJECTS[name] = SVNProject(name, url, debug=debug,
                                               verbose=verbose)
 
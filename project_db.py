@@ -12,9 +12,22 @@ from dictobject import DictObject
 from i3helper import Comparable
 from svn import SVNConnectException, SVNDate, SVNMetadata, svn_list, svn_log
 
-# Python3 redefined 'unicode' to be 'str'
+# Python3 redefined 'unicode' to be 'str' and moved 'intern' into 'sys'
 if sys.version_info[0] >= 3:
     unicode = str
+    intern = sys.intern
+
+
+def intern_string(value):
+    "Return the shared copy of a frequently repeated string (or None)"
+    if value is None:
+        return None
+
+    try:
+        return intern(value)
+    except TypeError:
+        # Python2 cannot intern 'unicode' strings
+        return value
 
 
 class DBException(Exception):
@@ -100,15 +113,17 @@ class SVNEntry(Comparable, DictObject):
                  num_lines, files, loglines, git_branch=None, git_hash=None):
         super(SVNEntry, self).__init__()
 
-        self.tag_name = tag_name
-        self.branch_name = branch_name
+        # there are only a handful of distinct branch, tag, and author
+        #  names, so share a single copy of each across all the entries
+        self.tag_name = intern_string(tag_name)
+        self.branch_name = intern_string(branch_name)
         self.revision = revision
-        self.author = author
+        self.author = intern_string(author)
         self.__date = SVNDate(svn_date)
         self.num_lines = num_lines
         self.filelist = None if files is None else files[:]
         self.loglines = loglines[:]
-        self.git_branch = git_branch
+        self.git_branch = intern_string(git_branch)
         self.git_hash = git_hash
         self.__saved = False
 
@@ -219,17 +234,10 @@ class SVNEntry(Comparable, DictObject):
 
     @property
     def log_message(self):
-        # build the commit message
-        message = None
-        if self.loglines is not None:
-            for line in self.loglines:
-                if message is None:
-                    message = str(line)
-                else:
-                    message += "\n" + str(line)
-        if message is None:
-            message = ""
-        return message
+        # build the commit message with a single join
+        if self.loglines is None:
+            return ""
+        return "\n".join(str(line) for line in self.loglines)
 
     @property
     def previous(self):
@@ -286,16 +294,38 @@ class ProjectDatabase(object):
         self.__conn = sqlite3.connect(path)
         self.__conn.row_factory = sqlite3.Row
 
-        # if necessary, create all the tables
         if allow_create:
+            # every converted revision commits its Git hash, so writers use
+            #  a write-ahead log to avoid syncing the whole file each time
+            self.__conn.execute("PRAGMA journal_mode=WAL")
+            self.__conn.execute("PRAGMA synchronous=NORMAL")
+
+            # if necessary, create all the tables
             self.__create_tables()
 
         # dictionary mapping SVN revision numbers to SVN log entries
         self.__cached_entries = None
 
+        # dictionary mapping branch names to lists of cached SVN log entries
+        #  (built from '__cached_entries' when first needed)
+        self.__cached_branches = None
+
         # dictionary mapping project URLs to their date returned by svn_list()
         self.__cached_urls = None
 
+        # dictionary mapping (branch, revision, with_git_hash) queries
+        #  to the results returned by find_hash_from_revision()
+        self.__cached_hashes = {}
+
+        # dictionary mapping (branch, revision) to the committed ancestor
+        #  entry returned by find_previous_revision()
+        self.__cached_ancestors = {}
+
+    def __clear_cached_queries(self):
+        "Forget all cached query results"
+        self.__cached_hashes.clear()
+        self.__cached_ancestors.clear()
+
     def __create_tables(self):
         with self.__conn:
             cursor = self.__conn.cursor()
@@ -320,6 +350,51 @@ class ProjectDatabase(object):
                            " FOREIGN KEY(revision) REFERENCES"
                            " svn_log(revision))")
 
+    def __find_hash_from_revision(self, svn_branch, revision, with_git_hash):
+        "Query the database for find_hash_from_revision()"
+
+        with self.__conn:
+            cursor = self.__conn.cursor()
+
+            where_keyword = "where"
+            if svn_branch is None:
+                branch_query_str = ""
+            else:
+                branch_query_str = " %s branch=\"%s\"" % \
+                  (where_keyword, svn_branch, )
+                where_keyword = "and"
+
+            if not with_git_hash:
+                hash_query_str = ""
+            else:
+                hash_query_str = " %s git_hash!=''" % (where_keyword, )
+                where_keyword = "and"
+
+            if revision is None:
+                rev_query_str = ""
+            else:
+                rev_query_str = " %s revision<=%s" % \
+                  (where_keyword, revision, )
+                where_keyword = "and"
+
+            cursor.execute("select git_branch, git_hash, branch, revision"
+                           " from svn_log" + branch_query_str + rev_query_str +
+                           hash_query_str + " order by revision desc limit 1")
+
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            if len(row) != 4:
+                raise DBException("Expected 4 columns, not %d" % (len(row), ))
+            if row[2] is None:
+                raise DBException("No revision found in %s" % (row, ))
+
+            if len(row[1]) == 7:
+                raise DBException("Found short hash %s for %s %s rev %s" %
+                                  (row[1], self.__name, svn_branch, revision))
+
+            return row[0], row[1], row[2], int(row[3])
+
     def __find_previous_references(self, debug=False, verbose=False):
         """
         Find references to previous revisions in commit messages
@@ -410,21 +485,85 @@ class ProjectDatabase(object):
 
         return prev_entry
 
-    def __get_files(self, revision):
+    def __get_all_files(self):
         """
-        Return a list of all (action, filename) pairs from the log message
+        Return a dictionary mapping each revision to its list of
+        (action, filename) pairs, fetched with a single query
         """
 
         cursor = self.__conn.cursor()
-        cursor.execute("select action, file from svn_log_file"
-                       " where revision=? order by logfile_id",
-                       (revision, ))
+        cursor.execute("select revision, action, file from svn_log_file"
+                       " order by revision, logfile_id")
+
+        all_files = {}
+        for row in cursor:
+            revision = row["revision"]
+            if revision not in all_files:
+                all_files[revision] = []
+            all_files[revision].append((row["action"], row["file"]))
+
+        return all_files
+
+    def __get_branch_entries(self, branch_name):
+        "Return the cached entries on 'branch_name', ordered by revision"
+        if self.__cached_branches is None:
+            # sort all the entries once and split them up by branch
+            branches = {}
+            for revision in sorted(self.__cached_entries):
+                entry = self.__cached_entries[revision]
+                if entry.branch_name not in branches:
+                    branches[entry.branch_name] = [entry, ]
+                else:
+                    branches[entry.branch_name].append(entry)
+            self.__cached_branches = branches
+
+        if branch_name not in self.__cached_branches:
+            return ()
+        return self.__cached_branches[branch_name]
+
+    def __insert_entry(self, cursor, entry):
+        """
+        Add or update an SVN log entry using 'cursor'
+        (the caller is responsible for committing the transaction)
+        """
 
-        files = []
-        for row in cursor.fetchall():
-            files.append((row["action"], row["file"]))
+        if entry.filelist is None:
+            raise DBException("File list has not been loaded")
 
-        return files
+        # if it exists, get previouos revision number
+        if entry.previous is None:
+            prev_revision = None
+        else:
+            prev_revision = entry.previous.revision
+
+        try:
+            cursor.execute("insert into svn_log(revision, tag, branch,"
+                           " author, date, num_lines, message,"
+                           " prev_revision, git_branch, git_hash)"
+                           " values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                           (entry.revision, entry.tag_name,
+                            entry.branch_name, entry.author, entry.date,
+                            entry.num_lines, entry.log_message,
+                            prev_revision, entry.git_branch,
+                            entry.git_hash))
+        except sqlite3.IntegrityError:
+            # entry exists, update it with the new data
+            cursor.execute("update svn_log set tag=?, branch=?, author=?,"
+                           " date=?, num_lines=?, message=?,"
+                           " prev_revision=?, git_branch=?, git_hash=?"
+                           " where revision=?",
+                           (entry.tag_name, entry.branch_name,
+                            entry.author, entry.date, entry.num_lines,
+                            entry.log_message, prev_revision,
+                            entry.git_branch, entry.git_hash,
+                            entry.revision))
+
+        cursor.executemany("insert into svn_log_file(revision, action, file)"
+                           " values (?, ?, ?)",
+                           ((entry.revision, action, filename)
+                            for action, filename in entry.filelist))
+
+        entry.set_saved(True)
 
     @classmethod
     def __list_svn_url(cls, project_name, url, debug=False):
@@ -440,7 +579,9 @@ class ProjectDatabase(object):
                 yield name, svn_date
                 continue
 
-            ignored.append(name)
+            # only keep track of ignored files if we're going to report them
+            if debug:
+                ignored.append(name)
 
         if debug:
             num_ignored = len(ignored)
@@ -456,46 +597,10 @@ class ProjectDatabase(object):
     def __save_entry_to_database(self, entry):
         "Save a single SVN log entry to the database"
 
-        if entry.filelist is None:
-            raise DBException("File list has not been loaded")
-
-        # if it exists, get previouos revision number
-        if entry.previous is None:
-            prev_revision = None
-        else:
-            prev_revision = entry.previous.revision
-
         with self.__conn:
-            cursor = self.__conn.cursor()
+            self.__insert_entry(self.__conn.cursor(), entry)
 
-            try:
-                cursor.execute("insert into svn_log(revision, tag, branch,"
-                               " author, date, num_lines, message,"
-                               " prev_revision, git_branch, git_hash)"
-                               " values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                               (entry.revision, entry.tag_name,
-                                entry.branch_name, entry.author, entry.date,
-                                entry.num_lines, entry.log_message,
-                                prev_revision, entry.git_branch,
-                                entry.git_hash))
-            except sqlite3.IntegrityError:
-                # entry exists, update it with the new data
-                cursor.execute("update svn_log set tag=?, branch=?, author=?,"
-                               " date=?, num_lines=?, message=?,"
-                               " prev_revision=?, git_branch=?, git_hash=?"
-                               " where revision=?",
-                               (entry.tag_name, entry.branch_name,
-                                entry.author, entry.date, entry.num_lines,
-                                entry.log_message, prev_revision,
-                                entry.git_branch, entry.git_hash,
-                                entry.revision))
-
-            for action, filename in entry.filelist:
-                cursor.execute("insert into svn_log_file(revision, action,"
-                               " file) values (?, ?, ?)",
-                               (entry.revision, action, filename))
-
-        entry.set_saved(True)
+        self.__clear_cached_queries()
 
     def __save_log_entries(self, url, branch, save_to_db=False, verbose=False):
         # if the branch name contains a slash separator,
@@ -511,37 +616,46 @@ class ProjectDatabase(object):
         #  so we can close it if we exit the loop early
         log_gen = svn_log(url, revision="HEAD", end_revision=1)
 
-        # update a copy of the cache in case we get interrupted
-        new_cache = None if self.__cached_entries is None \
-          else self.__cached_entries.copy()
-
-        # loop through all the log entries
-        for logentry in log_gen:
-            # if we've already seen this entry, then we've definitely seen
-            #  all the earlier entries
-            if new_cache is not None and \
-              logentry.revision in new_cache:
-                # since there are no more interesting entries, exit the loop
-                break
+        # collect new entries separately (rather than copying the entire
+        #  cache for every branch) so the cache is untouched if we get
+        #  interrupted
+        old_cache = self.__cached_entries
+        new_entries = {}
 
-            entry = SVNEntry(tag_name, branch, logentry.revision,
-                             logentry.author, logentry.date_string,
-                             logentry.num_lines, logentry.filedata,
-                             logentry.loglines)
+        # loop through all the log entries, saving them to the database
+        #  in a single transaction rather than committing each one
+        with self.__conn:
+            cursor = self.__conn.cursor()
 
-            # if necessary, initialize the cache dictionary
-            if new_cache is None:
-                new_cache = {}
+            for logentry in log_gen:
+                # if we've already seen this entry, then we've definitely
+                #  seen all the earlier entries
+                if old_cache is not None and logentry.revision in old_cache:
+                    # since there are no more interesting entries, exit
+                    break
+
+                entry = SVNEntry(tag_name, branch, logentry.revision,
+                                 logentry.author, logentry.date_string,
+                                 logentry.num_lines, logentry.filedata,
+                                 logentry.loglines)
 
-            # save this entry
-            new_cache[entry.revision] = entry
-            if save_to_db:
-                self.__save_entry_to_database(entry)
+                # save this entry
+                new_entries[entry.revision] = entry
+                if save_to_db:
+                    self.__insert_entry(cursor, entry)
 
         # close the generator so it cleans up the `svn log` process
         log_gen.close()
 
-        self.__cached_entries = new_cache
+        if save_to_db:
+            self.__clear_cached_queries()
+
+        if old_cache is None:
+            if len(new_entries) > 0:
+                self.__cached_entries = new_entries
+        else:
+            old_cache.update(new_entries)
+        self.__cached_branches = None
 
     @property
     def all_entries(self):
@@ -555,6 +669,8 @@ class ProjectDatabase(object):
             self.__conn = None
         if self.__cached_entries is not None:
             self.__cached_entries = None
+            self.__cached_branches = None
+        self.__clear_cached_queries()
         #if self.__urls_by_date is not None:
         #    self.__urls_by_date = None
 
@@ -564,12 +680,12 @@ class ProjectDatabase(object):
         if branch_name is None or branch_name == "":
             branch_name = SVNMetadata.TRUNK_NAME
 
-        for _, entry in sorted(self.__cached_entries.items(),
-                               key=lambda x: x[0]):
-            if entry.branch_name == branch_name:
-                if self.__ignore_func is not None and \
-                  not self.__ignore_func(entry.branch_name):
-                    yield entry
+        # every entry is on the same branch, so only check that branch once
+        if self.__ignore_func is None or self.__ignore_func(branch_name):
+            return
+
+        for entry in self.__get_branch_entries(branch_name):
+            yield entry
 
     def find_first_revision(self, branch_name):
         """
@@ -594,47 +710,16 @@ class ProjectDatabase(object):
         Return (git_branch, git_hash, svn_branch, svn_revision)
         """
 
-        with self.__conn:
-            cursor = self.__conn.cursor()
+        # externals are often pinned to the same revision for a long time,
+        #  so return the cached answer if we've already seen this query
+        cache_key = (svn_branch, revision, with_git_hash)
+        if cache_key in self.__cached_hashes:
+            return self.__cached_hashes[cache_key]
 
-            where_keyword = "where"
-            if svn_branch is None:
-                branch_query_str = ""
-            else:
-                branch_query_str = " %s branch=\"%s\"" % \
-                  (where_keyword, svn_branch, )
-                where_keyword = "and"
-
-            if not with_git_hash:
-                hash_query_str = ""
-            else:
-                hash_query_str = " %s git_hash!=''" % (where_keyword, )
-                where_keyword = "and"
-
-            if revision is None:
-                rev_query_str = ""
-            else:
-                rev_query_str = " %s revision<=%s" % \
-                  (where_keyword, revision, )
-                where_keyword = "and"
-
-            cursor.execute("select git_branch, git_hash, branch, revision"
-                           " from svn_log" + branch_query_str + rev_query_str +
-                           hash_query_str + " order by revision desc limit 1")
-
-            row = cursor.fetchone()
-            if row is None:
-                return None
-            if len(row) != 4:
-                raise DBException("Expected 4 columns, not %d" % (len(row), ))
-            if row[2] is None:
-                raise DBException("No revision found in %s" % (row, ))
-
-            if len(row[1]) == 7:
-                raise DBException("Found short hash %s for %s %s rev %s" %
-                                  (row[1], self.__name, svn_branch, revision))
-
-            return row[0], row[1], row[2], int(row[3])
+        result = self.__find_hash_from_revision(svn_branch, revision,
+                                                with_git_hash)
+        self.__cached_hashes[cache_key] = result
+        return result
 
     def find_log_entry(self, project_name, git_hash=None, revision=None,
                        svn_branch=None):
@@ -702,17 +787,38 @@ class ProjectDatabase(object):
         """
         saved_entry = entry
 
+        # look up the trunk name once rather than on every step
+        trunk_name = SVNMetadata.TRUNK_NAME
+
+        # remember every entry we pass through so later searches
+        #  which start from any of them can be answered immediately
+        visited = []
+
         while True:
+            cache_key = (branch_name, entry.revision)
+            if cache_key in self.__cached_ancestors:
+                found = self.__cached_ancestors[cache_key]
+                break
+
             if entry.git_branch is not None and entry.git_hash is not None:
                 if entry.branch_name == branch_name or \
-                  entry.branch_name == SVNMetadata.TRUNK_NAME:
-                    return entry
+                  entry.branch_name == trunk_name:
+                    found = entry
+                    break
+
+            visited.append(cache_key)
 
             if entry.previous is None:
+                found = None
                 break
 
             entry = entry.previous
 
+        if found is not None:
+            for key in visited:
+                self.__cached_ancestors[key] = found
+            return found
+
         raise DBException("Cannot find committed ancestor for %s SVN r%s"
                           " (started from r%s)" %
                           (self.name, entry.revision, saved_entry.revision))
@@ -803,16 +909,28 @@ class ProjectDatabase(object):
                               (self.__name, ))
 
         self.__cached_entries = {}
+        self.__cached_branches = None
         with self.__conn:
             cursor = self.__conn.cursor()
 
+            # fetch all the file lists at once instead of once per revision
+            if shallow:
+                all_files = None
+            else:
+                all_files = self.__get_all_files()
+
             cursor.execute("select * from svn_log order by revision")
 
-            for row in cursor.fetchall():
+            # stream rows from the cursor rather than fetching them all
+            for row in cursor:
                 if shallow:
                     files = None
                 else:
-                    files = self.__get_files(int(row["revision"]))
+                    revision = int(row["revision"])
+                    if revision in all_files:
+                        files = all_files[revision]
+                    else:
+                        files = []
 
                 entry = SVNEntry(row["tag"], row["branch"], row["revision"],
                                  row["author"], row["date"], row["num_lines"],
@@ -878,13 +996,8 @@ class ProjectDatabase(object):
         if branch_name is None:
             return len(self.__cached_entries)
 
-        # count the number of entries matching 'branch_name'
-        total = 0
-        for entry in self.__cached_entries.values():
-            if entry.branch_name == branch_name:
-                total += 1
-
-        return total
+        # return the number of entries matching 'branch_name'
+        return len(self.__get_branch_entries(branch_name))
 
     @classmethod
     def project_urls(cls, project_name, url, verbose=False):
@@ -951,7 +1064,10 @@ class ProjectDatabase(object):
                            " where revision=?",
                            (git_branch, git_hash, revision))
 
-        entry.git_branch = git_branch
+        # the new hash may change the answer to earlier queries
+        self.__clear_cached_queries()
+
+        entry.git_branch = intern_string(git_branch)
         entry.git_hash = git_hash
 
     def trim(self):
@@ -962,6 +1078,8 @@ class ProjectDatabase(object):
             cursor.execute("delete from svn_log")
             cursor.execute("delete from svn_log_file")
 
+        self.__clear_cached_queries()
+
         if self.__cached_entries is not None:
             for entry in self.__cached_entries.values():
                 entry.clear_saved()
@@ -986,6 +1104,9 @@ class ProjectDatabase(object):
                                 (self.__name, entry.revision,
                                  entry.previous.revision))
 
+        # the new link may change the answer to earlier queries
+        self.__clear_cached_queries()
+
 
 def main():
     # the pDAQ projects store tags under the 'releases' subdirectory
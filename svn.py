@@ -24,6 +24,10 @@ LOG_PROP_PAT = re.compile(r"^r(\d+)\s+"
                           r"\|\s+(\d+)\s+lines?\s*$")
 LOG_FILE_PAT = re.compile(r"^\s+(\S+)\s+(.*\S)\s*$")
 
+# map sandbox directories to (wc.db timestamp, svn_info() results)
+#  (entries are discarded by forget_sandbox_info())
+SANDBOX_INFO_CACHE = {}
+
 
 class SVNException(CommandException):
     "General Subversion exception"
@@ -246,9 +250,12 @@ def svn_checkout(svn_url, revision=None, target_dir=None, force=False,
     if target_dir is not None:
         cmd_args.append(target_dir)
 
-    run_command(cmd_args, cmdname=" ".join(cmd_args[:2]).upper(),
-                stderr_handler=handle_chkout_stderr, debug=debug,
-                dry_run=dry_run, verbose=verbose)
+    try:
+        run_command(cmd_args, cmdname=" ".join(cmd_args[:2]).upper(),
+                    stderr_handler=handle_chkout_stderr, debug=debug,
+                    dry_run=dry_run, verbose=verbose)
+    finally:
+        forget_sandbox_info(target_dir)
 
 
 def svn_commit(sandbox_dir, commit_message, debug=False, dry_run=False,
@@ -271,6 +278,7 @@ def svn_commit(sandbox_dir, commit_message, debug=False, dry_run=False,
                     dry_run=dry_run, verbose=verbose)
     finally:
         os.unlink(logfile.name)
+        forget_sandbox_info(sandbox_dir)
 
 
 def svn_copy(source, destination, log_message=None, revision=None,
@@ -509,6 +517,53 @@ def svn_info(svn_url=None, revision=None, sandbox_dir=None, debug=False,
     return info
 
 
+def forget_sandbox_info(sandbox_dir=None):
+    """
+    Discard cached svn_sandbox_info() results for 'sandbox_dir' and any
+    sandboxes (e.g. externals) below it
+    """
+    if sandbox_dir is None:
+        sandbox_dir = "."
+    path = os.path.abspath(sandbox_dir)
+    prefix = os.path.join(path, "")
+
+    for key in list(SANDBOX_INFO_CACHE.keys()):
+        if key == path or key.startswith(prefix):
+            del SANDBOX_INFO_CACHE[key]
+
+
+def svn_sandbox_info(sandbox_dir=None, debug=False, dry_run=False,
+                     verbose=False):
+    """
+    Return information about the Subversion sandbox at 'sandbox_dir'.
+    The previous answer is reused until the sandbox is changed by
+    svn_checkout(), svn_commit(), svn_revert(), svn_switch() or
+    svn_update(), or its working copy database is modified by some
+    other command.
+    """
+    if sandbox_dir is None:
+        sandbox_dir = "."
+    path = os.path.abspath(sandbox_dir)
+
+    try:
+        stat = os.stat(os.path.join(path, ".svn", "wc.db"))
+        stamp = (stat.st_mtime, stat.st_size)
+    except OSError:
+        # old or missing sandbox, don't cache anything
+        stamp = None
+
+    if stamp is not None and path in SANDBOX_INFO_CACHE:
+        cached_stamp, info = SANDBOX_INFO_CACHE[path]
+        if cached_stamp == stamp:
+            return info
+
+    info = svn_info(path, debug=debug, dry_run=dry_run, verbose=verbose)
+    if stamp is not None and not dry_run:
+        SANDBOX_INFO_CACHE[path] = (stamp, info)
+
+    return info
+
+
 class ListHandler(object):
     "Retry 'svn ls' command if it times out"
 
@@ -913,9 +968,12 @@ def svn_revert(pathlist=None, recursive=False, sandbox_dir=None, debug=False,
 
     cmd_args += pathlist
 
-    run_command(cmd_args, cmdname=" ".join(cmd_args[:2]).upper(),
-                working_directory=sandbox_dir, debug=debug,
-                dry_run=dry_run, verbose=verbose)
+    try:
+        run_command(cmd_args, cmdname=" ".join(cmd_args[:2]).upper(),
+                    working_directory=sandbox_dir, debug=debug,
+                    dry_run=dry_run, verbose=verbose)
+    finally:
+        forget_sandbox_info(sandbox_dir)
 
 
 def svn_status(sandbox_dir=None, debug=False, dry_run=False, verbose=False):
@@ -929,6 +987,33 @@ def svn_status(sandbox_dir=None, debug=False, dry_run=False, verbose=False):
         yield line
 
 
+def handle_switch_stderr(cmdname, line, error_url,
+                         ignore_bad_externals=False, verbose=False):
+    """
+    Throw special exceptions for 'svn switch'/'svn update' errors.
+    Return True if the line describes a bad external which should be ignored
+    """
+    # E160013: File not found
+    if line.startswith("svn: E160013: ") or \
+      (line.startswith("svn: Target path ") and
+       line.endswith(" does not exist")):
+        if ignore_bad_externals:
+            return True
+
+        raise SVNNonexistentException(error_url)
+
+    # E195012: Use --ignore-ancestry
+    if line.startswith("svn: E195012: "):
+        raise SVNBadAncestryException(error_url)
+
+    if line.startswith("svn: E155027: ") or \
+      line.find("Tree conflict on ") >= 0:
+        raise SVNMergeConflictException(cmdname)
+
+    handle_connect_stderr(cmdname, line, verbose=verbose)
+    return False
+
+
 class SwitchHandler(object):
     def __init__(self, svn_url=None, revision=None, accept_type=None,
                  ignore_ancestry=False, ignore_bad_externals=False,
@@ -965,24 +1050,9 @@ class SwitchHandler(object):
             print("SWITCH WARNING: %s" % (line, ), file=sys.stderr)
             return
 
-        # E160013: File not found
-        if line.startswith("svn: E160013: ") or \
-          (line.startswith("svn: Target path ") and
-           line.endswith(" does not exist")):
-            if self.__ignore_bad_externals:
-                return
-
-            raise SVNNonexistentException(self.__error_url)
-
-        # E195012: Use --ignore-ancestry
-        if line.startswith("svn: E195012: "):
-            raise SVNBadAncestryException(self.__error_url)
-
-        if line.startswith("svn: E155027: ") or \
-          line.find("Tree conflict on ") >= 0:
-            raise SVNMergeConflictException(cmdname)
-
-        handle_connect_stderr(cmdname, line, verbose=False)
+        handle_switch_stderr(cmdname, line, self.__error_url,
+                             ignore_bad_externals=self.__ignore_bad_externals,
+                             verbose=False)
 
     def run(self):
         cmdname = " ".join(self.__cmd_args[:2]).upper()
@@ -1008,8 +1078,11 @@ def svn_switch(svn_url=None, revision=None, accept_type=None,
                             ignore_externals=ignore_externals,
                             sandbox_dir=sandbox_dir, debug=debug,
                             dry_run=dry_run, verbose=verbose)
-    for line in handler.run():
-        yield line
+    try:
+        for line in handler.run():
+            yield line
+    finally:
+        forget_sandbox_info(sandbox_dir)
 
 
 class UpdateHandler(object):
@@ -1031,7 +1104,7 @@ class UpdateHandler(object):
             rstr = " rev %s" % (revision, )
 
         if accept_type is not None:
-            self.__cmd_args += ("--accept", accept_type)
+            self.__cmd_args += ("--accept", AcceptType.to_string(accept_type))
         if force:
             self.__cmd_args.append("--force")
         if ignore_externals:
@@ -1073,7 +1146,11 @@ class UpdateHandler(object):
             self.__ignored_error = True
             return
 
-        handle_connect_stderr(cmdname, line, verbose=False)
+        ignore_bad = self.__ignore_bad_externals
+        if handle_switch_stderr(cmdname, line, self.__error_url,
+                                ignore_bad_externals=ignore_bad,
+                                verbose=False):
+            self.__ignored_error = True
 
     def run(self):
         cmdname = " ".join(self.__cmd_args[:2]).upper()
@@ -1102,8 +1179,11 @@ def svn_update(svn_url=None, accept_type=None, force=False, revision=None,
                             ignore_bad_externals=ignore_bad_externals,
                             sandbox_dir=sandbox_dir, debug=debug,
                             dry_run=dry_run, verbose=verbose)
-    for line in handler.run():
-        yield line
+    try:
+        for line in handler.run():
+            yield line
+    finally:
+        forget_sandbox_info(sandbox_dir)
 
 
 class SVNMetadata(object):
@@ -1122,6 +1202,9 @@ class SVNMetadata(object):
     DATA_CACHE = None
     CACHE_ENABLED = True
 
+    # internal mapping of URL to split_url() results
+    SPLIT_CACHE = {}
+
     def __init__(self, url=None, directory=None, repository_root=None,
                  project_base=None, project_name=None, branch_name=None,
                  trunk_subdir=None, branches_subdir=None, tags_subdir=None):
@@ -1423,6 +1506,9 @@ class SVNMetadata(object):
             raise SVNException("Unknown directory type \"%s\"" %
                                (dirtype, ))
 
+        # cached URLs may have been split using the old name
+        cls.SPLIT_CACHE.clear()
+
     @classmethod
     def split_url(cls, url):
         """
@@ -1433,6 +1519,10 @@ class SVNMetadata(object):
         return (base_url, project_name, subdirectory)
         Otherwise return (original URL, None, None).
         """
+        # externals are split on every revision, so cache the results
+        if url in cls.SPLIT_CACHE:
+            return cls.SPLIT_CACHE[url]
+
         # copy the original URL in case we need to modify it
         tmp_url = url
 
@@ -1453,8 +1543,10 @@ class SVNMetadata(object):
             raise SVNException("Cannot extract project name from repository"
                                " URL \"%s\"" % (url, ))
 
-        # return the final set of strings
-        return base_url, project_name, sub_url
+        # cache and return the final set of strings
+        result = (base_url, project_name, sub_url)
+        cls.SPLIT_CACHE[url] = result
+        return result
 
     @property
     def tags_subdir(self):